@@ -1,26 +1,88 @@
+import hashlib
+import io
 import os
 import re
+import struct
 import sys
 import shutil
+import threading
+from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX platforms
+    fcntl = None  # type: ignore
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import groupby
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Iterable, Optional, Tuple
 
 import click
-from PIL import Image, ExifTags, ImageOps
+from PIL import Image, ImageOps
 from tqdm import tqdm
 
 # Enable HEIC/HEIF support if available. If not, JPEG/PNG/etc. still work.
 try:
-    from pillow_heif import register_heif_opener  # type: ignore
+    import pillow_heif  # type: ignore
 
     try:
-        register_heif_opener()
+        pillow_heif.register_heif_opener()
     except Exception:
         pass
 except Exception:
-    register_heif_opener = None  # type: ignore
+    pillow_heif = None  # type: ignore
+
+# Optional libjpeg-turbo backend for JPEG->JPEG re-encodes. Pillow's bundled
+# libjpeg is noticeably slower; if PyTurboJPEG is unavailable, a Pillow build
+# linked against libjpeg-turbo (e.g. CFLAGS="-mavx2") is the next best thing.
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG  # type: ignore
+
+    try:
+        _turbojpeg = TurboJPEG()
+    except Exception:
+        _turbojpeg = None
+except Exception:
+    _turbojpeg = None
+    TJPF_RGB = None  # type: ignore
+
+# Optional portable EXIF reader, used as fallback for non-JPEG formats.
+try:
+    import piexif  # type: ignore
+except Exception:
+    piexif = None  # type: ignore
+
+# Optional DFA-based multi-pattern matcher for filename datetime scanning.
+try:
+    import hyperscan  # type: ignore
+except Exception:
+    hyperscan = None  # type: ignore
+
+# NumPy and (optionally) OpenCV power perceptual-hash duplicate detection.
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    import cv2  # type: ignore
+except Exception:
+    cv2 = None  # type: ignore
+
+# Optional BK-tree for near-duplicate hash lookups.
+try:
+    import pybktree  # type: ignore
+except Exception:
+    pybktree = None  # type: ignore
+
+# Optional SIMD-parallel content hash; blake2b from the stdlib otherwise.
+try:
+    import blake3  # type: ignore
+except Exception:
+    blake3 = None  # type: ignore
 
 
 SUPPORTED_INPUT_EXTS = {".jpg", ".jpeg", ".png", ".heic", ".heif", ".webp", ".tif", ".tiff"}
@@ -38,21 +100,135 @@ DATETIME_NAME_PATTERNS = [
 ]
 
 
+def _load_name_pattern_db():
+    """Compile DATETIME_NAME_PATTERNS into a Hyperscan database.
+
+    The compiled database is cached on disk, keyed by a digest of the
+    pattern list so edits to the patterns invalidate it. Returns None when
+    hyperscan is not installed or compilation fails.
+    """
+    if hyperscan is None:
+        return None
+    # The "ids:" prefix versions the digest: caches compiled before pattern
+    # ids were passed to compile() must not be loaded back.
+    digest = hashlib.md5(
+        "\n".join(["ids:"] + [p.pattern for p in DATETIME_NAME_PATTERNS]).encode()
+    ).hexdigest()[:8]
+    cache_path = Path.home() / ".cache" / "photo-normalizer" / f"name_patterns-{digest}.hsdb"
+    try:
+        if cache_path.exists():
+            return hyperscan.loadb(cache_path.read_bytes())
+    except Exception:
+        pass
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[p.pattern.encode() for p in DATETIME_NAME_PATTERNS],
+            ids=list(range(len(DATETIME_NAME_PATTERNS))),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(DATETIME_NAME_PATTERNS),
+        )
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(hyperscan.dumpb(db))
+        except Exception:
+            pass
+        return db
+    except Exception:
+        return None
+
+
+_name_pattern_db = _load_name_pattern_db()
+# hs_scan scratch space must not be shared between concurrent scans, and
+# the planner calls in from many threads; serialize access to the database.
+_name_pattern_db_lock = threading.Lock()
+
+
+def _datetime_from_name_match(match: "re.Match") -> Optional[datetime]:
+    try:
+        return datetime(
+            int(match.group("y")),
+            int(match.group("m")),
+            int(match.group("d")),
+            int(match.group("h")),
+            int(match.group("min")),
+            int(match.group("s")),
+        )
+    except Exception:
+        return None
+
+
 def try_parse_from_name(name: str) -> Optional[datetime]:
+    if _name_pattern_db is not None:
+        # Hyperscan matches all patterns in one pass but only reports
+        # offsets, so re-run the matched pattern on the substring to pull
+        # out the capture groups.
+        hits: list = []
+
+        def _on_match(pat_id: int, start: int, end: int, flags: int, context=None):
+            hits.append((pat_id, start, end))
+
+        scanned = False
+        try:
+            encoded = name.encode()
+            with _name_pattern_db_lock:
+                _name_pattern_db.scan(encoded, match_event_handler=_on_match)
+            scanned = True
+            for pat_id, start, end in hits:
+                sub = encoded[start:end].decode("utf-8", "ignore")
+                match = DATETIME_NAME_PATTERNS[pat_id].search(sub)
+                if match:
+                    dt = _datetime_from_name_match(match)
+                    if dt:
+                        return dt
+        except Exception:
+            pass
+        # No hit at all is authoritative (same patterns compiled); hits
+        # that failed re-verification mean the id mapping and re engine
+        # disagree, so distrust the scan and fall through to re.
+        if scanned and not hits:
+            return None
     for pattern in DATETIME_NAME_PATTERNS:
         match = pattern.search(name)
         if match:
-            try:
-                return datetime(
-                    int(match.group("y")),
-                    int(match.group("m")),
-                    int(match.group("d")),
-                    int(match.group("h")),
-                    int(match.group("min")),
-                    int(match.group("s")),
-                )
-            except Exception:
-                continue
+            dt = _datetime_from_name_match(match)
+            if dt:
+                return dt
+    return None
+
+
+def _parse_exif_dt(value: str) -> datetime:
+    # EXIF datetimes are fixed-width ("2021:01:02 15:30:45"), so slicing
+    # beats strptime's general-purpose machinery by an order of magnitude.
+    # Positional slicing also accepts "-" or "/" as date separators.
+    return datetime(
+        int(value[0:4]),
+        int(value[5:7]),
+        int(value[8:10]),
+        int(value[11:13]),
+        int(value[14:16]),
+        int(value[17:19]),
+    )
+
+
+def _datetime_from_exif_value(value) -> Optional[datetime]:
+    if isinstance(value, bytes):
+        try:
+            value = value.decode("utf-8", "ignore")
+        except Exception:
+            pass
+    if isinstance(value, str):
+        # Typical format: 2021:01:02 15:30:45
+        value = value.strip()
+        try:
+            return _parse_exif_dt(value)
+        except Exception:
+            # Fall back to strptime for anything off-pattern
+            value = value.replace("/", ":")
+            for fmt in ("%Y:%m:%d %H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+                try:
+                    return datetime.strptime(value, fmt)
+                except Exception:
+                    continue
     return None
 
 
@@ -61,33 +237,164 @@ def get_exif_datetime(img: Image.Image) -> Optional[datetime]:
         exif_raw = img.getexif()
         if not exif_raw:
             return None
-        exif = {ExifTags.TAGS.get(tag, tag): value for tag, value in exif_raw.items()}
-        for key in ("DateTimeOriginal", "DateTime", "DateTimeDigitized"):
-            value = exif.get(key)
-            if isinstance(value, bytes):
-                try:
-                    value = value.decode("utf-8", "ignore")
-                except Exception:
-                    pass
-            if isinstance(value, str):
-                # Typical format: 2021:01:02 15:30:45
-                value = value.strip().replace("/", ":")
-                try:
-                    return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
-                except Exception:
-                    # Try more relaxed variants
-                    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S"):
-                        try:
-                            return datetime.strptime(value, fmt)
-                        except Exception:
-                            continue
+        # Look up the numeric tags directly instead of rebuilding a
+        # name-keyed dict per image: DateTimeOriginal, DateTime,
+        # DateTimeDigitized.
+        for tag in (0x9003, 0x0132, 0x9004):
+            dt = _datetime_from_exif_value(exif_raw.get(tag))
+            if dt:
+                return dt
         return None
     except Exception:
         return None
 
 
-def get_file_times(path: Path) -> datetime:
-    stat = path.stat()
+def _tiff_endian(tiff: bytes) -> Optional[str]:
+    if len(tiff) < 8:
+        return None
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return None
+    if struct.unpack(endian + "H", tiff[2:4])[0] != 42:
+        return None
+    return endian
+
+
+def _read_tiff_ifd(tiff: bytes, endian: str, offset: int) -> dict:
+    entries = {}
+    if offset + 2 > len(tiff):
+        return entries
+    (count,) = struct.unpack(endian + "H", tiff[offset:offset + 2])
+    for i in range(count):
+        base = offset + 2 + i * 12
+        if base + 12 > len(tiff):
+            break
+        tag, typ, n = struct.unpack(endian + "HHI", tiff[base:base + 8])
+        entries[tag] = (typ, n, tiff[base + 8:base + 12])
+    return entries
+
+
+def _exif_orientation_from_bytes(exif_bytes: Optional[bytes]) -> int:
+    """Read the EXIF Orientation tag from a raw blob; 1 when absent."""
+    if not exif_bytes:
+        return 1
+    tiff = exif_bytes[6:] if exif_bytes.startswith(b"Exif\x00\x00") else exif_bytes
+    try:
+        endian = _tiff_endian(tiff)
+        if endian is None:
+            return 1
+        (ifd0_offset,) = struct.unpack(endian + "I", tiff[4:8])
+        entry = _read_tiff_ifd(tiff, endian, ifd0_offset).get(0x0112)
+        if entry and entry[0] == 3:  # SHORT
+            return struct.unpack(endian + "H", entry[2][:2])[0] or 1
+    except Exception:
+        pass
+    return 1
+
+
+def _exif_datetime_from_tiff(tiff: bytes) -> Optional[datetime]:
+    """Pull a datetime tag out of a raw TIFF (EXIF) blob without Pillow."""
+    endian = _tiff_endian(tiff)
+    if endian is None:
+        return None
+
+    def read_ifd(offset: int) -> dict:
+        return _read_tiff_ifd(tiff, endian, offset)
+
+    def ascii_value(entry) -> Optional[str]:
+        typ, n, raw = entry
+        if typ != 2:  # ASCII
+            return None
+        if n <= 4:
+            data = raw[:n]
+        else:
+            (off,) = struct.unpack(endian + "I", raw)
+            if off + n > len(tiff):
+                return None
+            data = tiff[off:off + n]
+        return data.rstrip(b"\x00").decode("ascii", "ignore")
+
+    (ifd0_offset,) = struct.unpack(endian + "I", tiff[4:8])
+    ifd0 = read_ifd(ifd0_offset)
+    exif_ifd = {}
+    if 0x8769 in ifd0:  # pointer to the Exif sub-IFD
+        try:
+            (exif_offset,) = struct.unpack(endian + "I", ifd0[0x8769][2])
+            exif_ifd = read_ifd(exif_offset)
+        except Exception:
+            pass
+
+    # Same preference order as get_exif_datetime
+    for ifd, tag in ((exif_ifd, 0x9003), (ifd0, 0x0132), (exif_ifd, 0x9004)):
+        entry = ifd.get(tag)
+        if entry:
+            dt = _datetime_from_exif_value(ascii_value(entry))
+            if dt:
+                return dt
+    return None
+
+
+def _exif_datetime_from_jpeg_bytes(data: bytes) -> Optional[datetime]:
+    """Scan JPEG segment markers for an APP1/Exif block and parse it."""
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        if marker == 0xDA:  # start of scan: no EXIF past this point
+            return None
+        (length,) = struct.unpack(">H", data[pos + 2:pos + 4])
+        if marker == 0xE1:
+            segment = data[pos + 4:pos + 2 + length]
+            if segment.startswith(b"Exif\x00\x00"):
+                return _exif_datetime_from_tiff(segment[6:])
+        pos += 2 + length
+    return None
+
+
+def get_exif_datetime_fast(path: Path, data: Optional[bytes] = None) -> Optional[datetime]:
+    """Read the capture datetime from EXIF without decoding pixel data.
+
+    JPEGs are parsed directly from the leading APP1 segment; other
+    non-HEIF formats go through piexif when installed. Returns None when
+    nothing usable is found so callers can fall back to a full Pillow open.
+    When the caller already holds the file bytes, pass them via `data` to
+    skip the read.
+    """
+    suffix = path.suffix.lower()
+    if suffix in (".jpg", ".jpeg"):
+        try:
+            if data is not None:
+                head = data[:131072]
+            else:
+                with open(path, "rb") as f:
+                    # EXIF lives in the leading segments; 128 KB is plenty.
+                    head = f.read(131072)
+            dt = _exif_datetime_from_jpeg_bytes(head)
+            if dt:
+                return dt
+        except Exception:
+            pass
+    if piexif is not None and suffix not in (".heic", ".heif"):
+        try:
+            exif = piexif.load(str(path))
+            for ifd, tag in (("Exif", 0x9003), ("0th", 0x0132), ("Exif", 0x9004)):
+                dt = _datetime_from_exif_value(exif.get(ifd, {}).get(tag))
+                if dt:
+                    return dt
+        except Exception:
+            pass
+    return None
+
+
+def get_file_times(path: Path, st: Optional[os.stat_result] = None) -> datetime:
+    stat = st if st is not None else path.stat()
     # Prefer birth time if available on macOS, else fallback to mtime
     try:
         birth_ts = getattr(stat, "st_birthtime", None)
@@ -97,10 +404,24 @@ def get_file_times(path: Path) -> datetime:
     return datetime.fromtimestamp(ts)
 
 
-def determine_capture_datetime(path: Path) -> datetime:
-    # 1) EXIF
+def determine_capture_datetime(
+    path: Path,
+    data: Optional[bytes] = None,
+    st: Optional[os.stat_result] = None,
+) -> datetime:
+    # 1) EXIF, without decoding the image when possible
+    dt = get_exif_datetime_fast(path, data=data)
+    if dt:
+        return dt
     try:
-        with Image.open(path) as img:
+        with Image.open(io.BytesIO(data) if data is not None else path) as img:
+            if img.format == "JPEG":
+                # Only the header/EXIF is needed here; draft mode tells
+                # libjpeg to run scaled fast-DCT if anything does decode.
+                try:
+                    img.draft("RGB", (1, 1))
+                except Exception:
+                    pass
             dt = get_exif_datetime(img)
             if dt:
                 return dt
@@ -113,18 +434,32 @@ def determine_capture_datetime(path: Path) -> datetime:
         return dt_from_name
 
     # 3) File times
-    return get_file_times(path)
+    return get_file_times(path, st=st)
 
 
 def iter_input_files(root: Path, recursive: bool) -> Iterable[Path]:
-    if recursive:
-        for path in root.rglob("*"):
-            if path.is_file() and path.suffix.lower() in SUPPORTED_INPUT_EXTS:
-                yield path
-    else:
-        for path in root.iterdir():
-            if path.is_file() and path.suffix.lower() in SUPPORTED_INPUT_EXTS:
-                yield path
+    # os.scandir exposes the file type from the directory entry itself,
+    # avoiding the per-entry stat() that rglob/is_file would issue.
+    try:
+        entries = os.scandir(root)
+    except (PermissionError, FileNotFoundError):
+        # Unreadable or vanished directories (lost+found, .Trashes, ...)
+        # are skipped, matching rglob's traversal behavior.
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        yield from iter_input_files(Path(entry.path), True)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+            except (PermissionError, FileNotFoundError):
+                continue
+            dot = entry.name.rfind(".")
+            if dot != -1 and entry.name[dot:].lower() in SUPPORTED_INPUT_EXTS:
+                yield Path(entry.path)
 
 
 @dataclass
@@ -133,6 +468,61 @@ class PlanItem:
     target: Path
     capture_dt: datetime
     needs_reencode: bool
+    # Raw file bytes read during planning, reused by the encoder to avoid
+    # a second read of the same file. Only kept for small-enough files.
+    src_bytes: Optional[bytes] = None
+    # Stat result captured during planning, reused instead of re-stat()ing.
+    st: Optional[os.stat_result] = None
+
+
+# Cap how much source data the planning pass may keep in memory.
+_SOURCE_CACHE_MAX_FILE = 32 * 1024 * 1024
+_SOURCE_CACHE_BUDGET = 200 * 1024 * 1024
+
+
+class SourceCacheBudget:
+    """Per-run memory budget for planning-phase source-byte caching.
+
+    Each planning pass gets its own budget, so long-lived processes (the
+    web server runs many jobs) don't exhaust a process-wide counter.
+    """
+
+    def __init__(self, limit: int = _SOURCE_CACHE_BUDGET) -> None:
+        self.limit = limit
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def take(self, size: int) -> bool:
+        with self._lock:
+            if self._used + size > self.limit:
+                return False
+            self._used += size
+            return True
+
+    def release(self, size: int) -> None:
+        with self._lock:
+            self._used -= size
+
+
+def _read_source_if_cacheable(
+    path: Path,
+    size: Optional[int] = None,
+    budget: Optional[SourceCacheBudget] = None,
+) -> Optional[bytes]:
+    if budget is None:
+        return None
+    if size is None:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+    if size > _SOURCE_CACHE_MAX_FILE or not budget.take(size):
+        return None
+    try:
+        return path.read_bytes()
+    except OSError:
+        budget.release(size)
+        return None
 
 
 def build_target_path(
@@ -154,16 +544,170 @@ def build_target_path(
     return output_dir / base_name
 
 
-def ensure_unique(path: Path) -> Path:
-    if not path.exists():
-        return path
-    stem, ext = path.stem, path.suffix
-    counter = 1
-    while True:
-        candidate = path.with_name(f"{stem}__{counter}{ext}")
-        if not candidate.exists():
-            return candidate
-        counter += 1
+def ensure_unique(path: Path, assigned: "Optional[set[Path]]" = None) -> Path:
+    """Return a collision-free variant of `path`.
+
+    Targets assigned earlier in the same run are tracked in `assigned`, so
+    in-process collisions resolve with set lookups instead of stat calls;
+    the disk is only consulted once per candidate for pre-existing files.
+    The chosen path is added to `assigned` before returning.
+    """
+
+    def taken(candidate: Path) -> bool:
+        if assigned is not None and candidate in assigned:
+            return True
+        return candidate.exists()
+
+    result = path
+    if taken(path):
+        stem, ext = path.stem, path.suffix
+        counter = 1
+        while True:
+            candidate = path.with_name(f"{stem}__{counter}{ext}")
+            if not taken(candidate):
+                result = candidate
+                break
+            counter += 1
+    if assigned is not None:
+        assigned.add(result)
+    return result
+
+
+# ioctl to clone a file via copy-on-write on reflink filesystems (btrfs/XFS).
+_FICLONE = getattr(fcntl, "FICLONE", 0x40049409) if fcntl is not None else None
+
+
+def _fast_copy(src_path: Path, dest_path: Path, st: Optional[os.stat_result] = None) -> None:
+    """Copy a file through the kernel, falling back to shutil.copy2.
+
+    Tries, in order: FICLONE reflink (instant CoW clone on supporting
+    filesystems), copy_file_range (in-kernel copy, same filesystem), and
+    sendfile (no user-space buffering, works across devices). Metadata is
+    preserved like shutil.copy2; a stat result captured earlier can be
+    passed via `st` to avoid re-reading it.
+    """
+    try:
+        with open(src_path, "rb") as fsrc, open(dest_path, "wb") as fdst:
+            done = False
+            if _FICLONE is not None:
+                try:
+                    fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                    done = True
+                except OSError:
+                    pass
+            if not done and hasattr(os, "copy_file_range"):
+                try:
+                    while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 24):
+                        pass
+                    done = True
+                except OSError:
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+            if not done and hasattr(os, "sendfile"):
+                try:
+                    size = os.fstat(fsrc.fileno()).st_size
+                    offset = 0
+                    while offset < size:
+                        sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    done = offset >= size
+                    if not done:
+                        # Early EOF (e.g. concurrent truncation): discard the
+                        # partial copy before the buffered fallback rewrites it.
+                        fsrc.seek(0)
+                        fdst.seek(0)
+                        fdst.truncate()
+                except OSError:
+                    fsrc.seek(0)
+                    fdst.seek(0)
+                    fdst.truncate()
+            if not done:
+                shutil.copyfileobj(fsrc, fdst, 1 << 20)
+        if st is not None:
+            os.utime(dest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.chmod(dest_path, st.st_mode & 0o7777)
+        else:
+            shutil.copystat(src_path, dest_path)
+    except Exception:
+        shutil.copy2(src_path, dest_path)
+
+
+def _try_save_turbojpeg(
+    src_path: Path,
+    dest_path: Path,
+    output_format: str,
+    quality: int,
+    keep_metadata: bool,
+    src_bytes: Optional[bytes] = None,
+) -> bool:
+    """Re-encode JPEG->JPEG via libjpeg-turbo, bypassing Pillow.
+
+    Only applies when metadata is stripped and the image carries no EXIF
+    orientation, so the output matches the Pillow path byte-for-pixel.
+    Returns True if the file was written.
+    """
+    if _turbojpeg is None or output_format != "jpeg" or keep_metadata:
+        return False
+    if src_path.suffix.lower() not in (".jpg", ".jpeg"):
+        return False
+    try:
+        data = src_bytes if src_bytes is not None else src_path.read_bytes()
+        # Header-only open; getexif() does not decode pixel data.
+        with Image.open(io.BytesIO(data)) as img:
+            if img.getexif().get(0x0112, 1) != 1:  # Orientation
+                return False
+        arr = _turbojpeg.decode(data)
+        dest_path.write_bytes(_turbojpeg.encode(arr, quality=quality))
+        return True
+    except Exception:
+        return False
+
+
+def _try_save_heif_turbojpeg(
+    src_path: Path,
+    dest_path: Path,
+    output_format: str,
+    quality: int,
+    keep_metadata: bool,
+    src_bytes: Optional[bytes] = None,
+) -> bool:
+    """Encode HEIC/HEIF straight to JPEG bytes, skipping the PIL Image.
+
+    pillow_heif exposes the decoded RGB buffer directly; feeding it into
+    libjpeg-turbo avoids materializing an intermediate PIL image and its
+    extra full-frame copy. Returns True if the file was written.
+    """
+    if _turbojpeg is None or np is None or pillow_heif is None:
+        return False
+    if output_format != "jpeg" or src_path.suffix.lower() not in (".heic", ".heif"):
+        return False
+    try:
+        heif_file = pillow_heif.open_heif(
+            io.BytesIO(src_bytes) if src_bytes is not None else str(src_path)
+        )
+        exif_bytes = heif_file.info.get("exif")
+        if heif_file.mode != "RGB":
+            return False
+        # The Pillow path transposes rotated images; don't diverge from it.
+        if _exif_orientation_from_bytes(exif_bytes) != 1:
+            return False
+        if keep_metadata and exif_bytes and piexif is None:
+            return False  # cannot re-attach EXIF without piexif
+        arr = np.asarray(heif_file)
+        # pillow_heif hands back RGB; PyTurboJPEG's encode defaults to BGR
+        # (OpenCV convention), which would swap red and blue.
+        dest_path.write_bytes(_turbojpeg.encode(arr, quality=quality, pixel_format=TJPF_RGB))
+        if keep_metadata and exif_bytes:
+            try:
+                piexif.insert(exif_bytes, str(dest_path))
+            except Exception:
+                pass
+        return True
+    except Exception:
+        return False
 
 
 def save_image(
@@ -173,12 +717,23 @@ def save_image(
     quality: int,
     keep_metadata: bool,
     reencode: bool,
+    src_bytes: Optional[bytes] = None,
+    st: Optional[os.stat_result] = None,
 ) -> None:
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    # Parent directories are pre-created in bulk (see _make_target_dirs);
+    # callers outside the planned pipeline must create them beforehand.
     if not reencode:
-        shutil.copy2(src_path, dest_path)
+        _fast_copy(src_path, dest_path, st=st)
+        return
+    if _try_save_turbojpeg(src_path, dest_path, output_format, quality, keep_metadata, src_bytes):
         return
-    with Image.open(src_path) as img:
+    if _try_save_heif_turbojpeg(src_path, dest_path, output_format, quality, keep_metadata, src_bytes):
+        return
+    with Image.open(io.BytesIO(src_bytes) if src_bytes is not None else src_path) as img:
+        try:
+            src_orientation = img.getexif().get(0x0112, 1)
+        except Exception:
+            src_orientation = 1
         # Respect EXIF orientation when re-encoding
         try:
             img = ImageOps.exif_transpose(img)
@@ -195,7 +750,269 @@ def save_image(
                 save_kwargs["exif"] = exif_bytes
         if not keep_metadata:
             img.info.clear()
-        img.convert("RGB").save(dest_path, format=output_format.upper(), **save_kwargs)
+        # Only convert when needed; for RGB sources (the common JPEG case)
+        # convert("RGB") would still copy the full pixel buffer.
+        if img.mode == "RGB":
+            out = img
+        elif img.mode == "RGBA" and output_format in ("png", "webp", "tiff"):
+            out = img  # alpha-capable output: keep the channel
+        else:
+            out = img.convert("RGB")
+        out.save(dest_path, format=output_format.upper(), **save_kwargs)
+
+        # Pillow's exif blob can lose maker notes; for JPEG->JPEG overwrite
+        # it with a full transplant from the source file. Only safe when the
+        # source carries no orientation, since the pixels were transposed.
+        if (
+            keep_metadata
+            and output_format == "jpeg"
+            and piexif is not None
+            and src_orientation == 1
+            and src_path.suffix.lower() in (".jpg", ".jpeg")
+        ):
+            try:
+                piexif.transplant(str(src_path), str(dest_path))
+            except Exception:
+                pass  # keep the Pillow-written EXIF
+
+
+def _hash_file(path: Path, src_bytes: Optional[bytes] = None) -> Optional[str]:
+    h = blake3.blake3() if blake3 is not None else hashlib.blake2b()
+    try:
+        if src_bytes is not None:
+            h.update(src_bytes)
+        else:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+
+def _filter_exact_duplicates(plan: "list[PlanItem]", verbose: bool) -> "list[PlanItem]":
+    """Drop byte-identical sources (e.g. the same card imported twice).
+
+    Two-phase: group by file size first, then content-hash only files
+    sharing a size. The plan is sorted, so the earliest capture in each
+    identical group is the one kept.
+    """
+    by_size: "defaultdict[int, list[PlanItem]]" = defaultdict(list)
+    for item in plan:
+        if item.st is not None:
+            by_size[item.st.st_size].append(item)
+
+    to_hash = [item for bucket in by_size.values() if len(bucket) > 1 for item in bucket]
+    if not to_hash:
+        return plan
+
+    with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 1)) as executor:
+        digests = dict(
+            zip(
+                (id(item) for item in to_hash),
+                executor.map(lambda item: _hash_file(item.source, item.src_bytes), to_hash),
+            )
+        )
+
+    kept: "list[PlanItem]" = []
+    seen: dict = {}
+    for item in plan:
+        digest = digests.get(id(item))
+        if digest is not None:
+            key = (item.st.st_size, digest)
+            original = seen.get(key)
+            if original is not None:
+                if verbose:
+                    click.echo(f"SKIP identical {item.source} (same content as {original.source})")
+                continue
+            seen[key] = item
+        kept.append(item)
+    return kept
+
+
+_PHASH_DISTANCE_THRESHOLD = 2
+
+
+def _dct_matrix(n: int) -> "np.ndarray":
+    k = np.arange(n)
+    m = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2.0)
+    return m
+
+
+def compute_phash(path: Path, data: Optional[bytes] = None) -> Optional[int]:
+    """Compute a 64-bit DCT perceptual hash (pHash) of an image.
+
+    Grayscale -> 32x32 -> 2D DCT -> low-frequency 8x8 block -> binarize
+    against the median. Decode and resize always go through Pillow so
+    every format we accept (including HEIC, which cv2.imread cannot read)
+    is hashed through the same pipeline and hashes stay comparable within
+    a run; OpenCV contributes only its SIMD DCT when installed. Returns
+    None if the image cannot be hashed.
+    """
+    if np is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data) if data is not None else path) as img:
+            small = np.asarray(img.convert("L").resize((32, 32)), dtype=np.float64)
+        if cv2 is not None:
+            dct = cv2.dct(np.float32(small))
+        else:
+            m = _dct_matrix(32)
+            dct = m @ small @ m.T
+        low = dct[:8, :8]
+        bits = (low > np.median(low)).flatten()
+        return int(np.packbits(bits).tobytes().hex(), 16)
+    except Exception:
+        return None
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _filter_perceptual_duplicates(plan: "list[PlanItem]", verbose: bool) -> "list[PlanItem]":
+    """Drop plan items whose pHash is within the threshold of a kept item.
+
+    The plan is expected to be sorted by capture date, so the earliest
+    image in each near-duplicate group is the one kept.
+    """
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        hashes = list(
+            tqdm(
+                executor.map(lambda item: compute_phash(item.source, item.src_bytes), plan),
+                total=len(plan),
+                desc="Hashing",
+                unit="img",
+            )
+        )
+
+    kept: list[PlanItem] = []
+    original_for_hash: dict = {}
+    tree = pybktree.BKTree(_hamming) if pybktree is not None else None
+    kept_hashes: list = []
+    for item, h in zip(plan, hashes):
+        duplicate_of = None
+        if h is not None:
+            if tree is not None:
+                found = tree.find(h, _PHASH_DISTANCE_THRESHOLD)
+                if found:
+                    duplicate_of = original_for_hash[min(found)[1]]
+            else:
+                for kept_hash in kept_hashes:
+                    if _hamming(h, kept_hash) <= _PHASH_DISTANCE_THRESHOLD:
+                        duplicate_of = original_for_hash[kept_hash]
+                        break
+        if duplicate_of is not None:
+            if verbose:
+                click.echo(f"SKIP duplicate {item.source} (matches {duplicate_of.source})")
+            continue
+        kept.append(item)
+        if h is not None and h not in original_for_hash:
+            original_for_hash[h] = item
+            kept_hashes.append(h)
+            if tree is not None:
+                tree.add(h)
+    return kept
+
+
+def _sort_plan(plan: "list[PlanItem]") -> "list[PlanItem]":
+    """Sort by capture date then source name for stable ordering."""
+    if np is not None and len(plan) > 1:
+        # Comparison-based Python sort dominates for large plans; lexsort
+        # runs in compiled code. Microsecond-resolution int64 keys are
+        # exact up to year ~2255.
+        usecs = np.array(
+            [round(item.capture_dt.timestamp() * 1_000_000) for item in plan],
+            dtype=np.int64,
+        )
+        names = np.array([item.source.name for item in plan])
+        order = np.lexsort((names, usecs))
+        return [plan[i] for i in order]
+    plan.sort(key=lambda p: (p.capture_dt, p.source.name))
+    return plan
+
+
+def _sequence_numbers(plan: "list[PlanItem]") -> "list[int]":
+    """1-based sequence number per capture second over a sorted plan."""
+    if np is not None and plan:
+        secs = np.array(
+            [int(item.capture_dt.replace(microsecond=0).timestamp()) for item in plan],
+            dtype=np.int64,
+        )
+        n = len(secs)
+        positions = np.arange(n, dtype=np.int64)
+        new_run = np.empty(n, dtype=bool)
+        new_run[0] = True
+        new_run[1:] = secs[1:] != secs[:-1]
+        # Index of the start of each same-second run, propagated forward.
+        run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+        return (positions - run_start + 1).tolist()
+
+    # One key computation per item and no per-item branching: the plan is
+    # already sorted, so groupby yields each same-second run intact.
+    seqs: list[int] = []
+    for _, group in groupby(plan, key=lambda p: p.capture_dt.replace(microsecond=0)):
+        seqs.extend(range(1, sum(1 for _ in group) + 1))
+    return seqs
+
+
+def _plan_one(
+    path: Path,
+    target_ext: str,
+    copy_unchanged: bool,
+    budget: Optional[SourceCacheBudget] = None,
+) -> PlanItem:
+    needs_reencode = True
+    if copy_unchanged and path.suffix.lower() == target_ext:
+        needs_reencode = False
+
+    # stat once; the datetime fallback, byte cache and copy phase all reuse it.
+    try:
+        st: Optional[os.stat_result] = path.stat()
+    except OSError:
+        st = None
+
+    # Read the file once and let the encoder reuse the bytes instead of
+    # hitting the disk again in the save phase.
+    src_bytes = None
+    if needs_reencode:
+        src_bytes = _read_source_if_cacheable(path, st.st_size if st else None, budget)
+
+    try:
+        capture_dt = determine_capture_datetime(path, data=src_bytes, st=st)
+    except Exception:
+        capture_dt = get_file_times(path, st=st)
+
+    return PlanItem(
+        source=path,
+        capture_dt=capture_dt,
+        target=Path(),  # placeholder filled after sorting
+        needs_reencode=needs_reencode,
+        src_bytes=src_bytes,
+        st=st,
+    )
+
+
+def _make_target_dirs(plan: "list[PlanItem]") -> None:
+    # One mkdir per distinct directory instead of one per image.
+    for parent in {item.target.parent for item in plan}:
+        parent.mkdir(parents=True, exist_ok=True)
+
+
+def _save_one(args: Tuple[PlanItem, str, int, bool]) -> None:
+    # Module-level so it is picklable for ProcessPoolExecutor workers.
+    item, output_format, quality, keep_metadata = args
+    save_image(
+        src_path=item.source,
+        dest_path=item.target,
+        output_format=output_format,
+        quality=quality,
+        keep_metadata=keep_metadata,
+        reencode=item.needs_reencode,
+        src_bytes=item.src_bytes,
+        st=item.st,
+    )
 
 
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
@@ -205,7 +1022,7 @@ def save_image(
 @click.option("--quality", type=click.IntRange(1, 100), default=90, show_default=True, help="Quality for compressed formats")
 @click.option("--keep-metadata/--strip-metadata", default=True, show_default=True, help="Keep or strip metadata")
 @click.option("--subfolders", type=click.Choice(["none", "day", "month", "year"]), default="none", show_default=True, help="Date-based subfolders")
-@click.option("--hash-duplicates/--no-hash-duplicates", default=False, show_default=True, help="Enable perceptual hash duplicate detection (not implemented; reserved)")
+@click.option("--hash-duplicates/--no-hash-duplicates", default=False, show_default=True, help="Skip near-duplicate images detected via perceptual hashing")
 @click.option("--copy-unchanged/--reencode", "copy_unchanged", default=True, show_default=True, help="Copy images that already match target format instead of re-encoding")
 @click.option("-r", "--recursive", is_flag=True, help="Recurse into subdirectories")
 @click.option("--dry-run", is_flag=True, help="Show planned actions without writing files")
@@ -217,56 +1034,54 @@ def main(
     quality: int,
     keep_metadata: bool,
     subfolders: str,
-    hash_duplicates: bool,  # placeholder
+    hash_duplicates: bool,
     copy_unchanged: bool,
     recursive: bool,
     dry_run: bool,
     verbose: bool,
 ) -> None:
     """Convert photos to a uniform format and order them by capture date."""
-    del hash_duplicates  # not implemented in initial version
-
     target_ext = OUTPUT_FORMAT_TO_EXT[output_format]
     input_files = list(iter_input_files(input_dir, recursive))
     if not input_files:
         click.echo("No supported images found.")
         sys.exit(1)
 
-    plan: list[PlanItem] = []
-    for path in input_files:
-        try:
-            capture_dt = determine_capture_datetime(path)
-        except Exception:
-            capture_dt = get_file_times(path)
-
-        needs_reencode = True
-        if copy_unchanged and path.suffix.lower() == target_ext:
-            needs_reencode = False
-
-        plan.append(
-            PlanItem(
-                source=path,
-                capture_dt=capture_dt,
-                target=Path(),  # placeholder filled below
-                needs_reencode=needs_reencode,
+    # Planning is I/O-bound (stat + EXIF header reads), so threads help;
+    # executor.map preserves input order for the sort below.
+    budget = SourceCacheBudget()
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        plan: list[PlanItem] = list(
+            tqdm(
+                executor.map(partial(_plan_one, target_ext=target_ext, copy_unchanged=copy_unchanged, budget=budget), input_files),
+                total=len(input_files),
+                desc="Scanning",
+                unit="img",
             )
         )
 
-    # Sort by capture date then by name for stable ordering
-    plan.sort(key=lambda p: (p.capture_dt, p.source.name))
+    plan = _sort_plan(plan)
 
-    # Assign target paths with sequence per second to avoid collisions
-    last_second: Optional[datetime] = None
-    seq_in_second = 0
-    for item in plan:
-        current_second = item.capture_dt.replace(microsecond=0)
-        if last_second is None or current_second != last_second:
-            seq_in_second = 1
-            last_second = current_second
+    before = len(plan)
+    plan = _filter_exact_duplicates(plan, verbose)
+    if before != len(plan):
+        click.echo(f"Skipped {before - len(plan)} byte-identical duplicate(s).")
+
+    if hash_duplicates:
+        if np is None:
+            click.echo("NumPy is required for --hash-duplicates; skipping duplicate detection.")
         else:
-            seq_in_second += 1
+            before = len(plan)
+            plan = _filter_perceptual_duplicates(plan, verbose)
+            skipped = before - len(plan)
+            if skipped:
+                click.echo(f"Skipped {skipped} near-duplicate image(s).")
+
+    # Assign target paths with sequence per second to avoid collisions
+    assigned: set[Path] = set()
+    for item, seq_in_second in zip(plan, _sequence_numbers(plan)):
         target_path = build_target_path(output_dir, item.capture_dt, seq_in_second, subfolders, target_ext)
-        item.target = ensure_unique(target_path)
+        item.target = ensure_unique(target_path, assigned)
 
     if dry_run or verbose:
         for item in plan:
@@ -276,15 +1091,18 @@ def main(
     if dry_run:
         return
 
-    for item in tqdm(plan, desc="Processing", unit="img"):
-        save_image(
-            src_path=item.source,
-            dest_path=item.target,
-            output_format=output_format,
-            quality=quality,
-            keep_metadata=keep_metadata,
-            reencode=item.needs_reencode,
-        )
+    _make_target_dirs(plan)
+
+    # Decode/encode is compute-bound; fan it out across all cores.
+    tasks = [(item, output_format, quality, keep_metadata) for item in plan]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for _ in tqdm(
+            executor.map(_save_one, tasks, chunksize=8),
+            total=len(plan),
+            desc="Processing",
+            unit="img",
+        ):
+            pass
 
     click.echo(f"Done. Wrote {len(plan)} images to {output_dir}")
 
@@ -240,9 +240,24 @@ class PhotoNormalizerApp {
     }
 
     startProgressPolling() {
-        this.progressInterval = setInterval(() => {
-            this.updateProgress();
-        }, 1000);
+        // Prefer server-sent events; fall back to polling if unavailable
+        if (window.EventSource) {
+            this.eventSource = new EventSource(`/api/events/${this.currentJobId}`);
+            this.eventSource.onmessage = (event) => {
+                this.handleStatus(JSON.parse(event.data));
+            };
+            this.eventSource.onerror = () => {
+                if (!this.eventSource) return;
+                this.stopProgressPolling();
+                this.progressInterval = setInterval(() => {
+                    this.updateProgress();
+                }, 1000);
+            };
+        } else {
+            this.progressInterval = setInterval(() => {
+                this.updateProgress();
+            }, 1000);
+        }
     }
 
     stopProgressPolling() {
@@ -250,6 +265,23 @@ class PhotoNormalizerApp {
             clearInterval(this.progressInterval);
             this.progressInterval = null;
         }
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+
+    handleStatus(status) {
+        this.updateProgressUI(status);
+
+        if (status.status === 'completed') {
+            this.stopProgressPolling();
+            this.showResults(status);
+        } else if (status.status === 'error') {
+            this.stopProgressPolling();
+            this.showError(`Processing failed: ${status.error}`);
+            this.resetForNewProcess();
+        }
     }
 
     async updateProgress() {
@@ -263,16 +295,7 @@ class PhotoNormalizerApp {
                 throw new Error(status.error || 'Failed to get status');
             }
 
-            this.updateProgressUI(status);
-
-            if (status.status === 'completed') {
-                this.stopProgressPolling();
-                this.showResults(status);
-            } else if (status.status === 'error') {
-                this.stopProgressPolling();
-                this.showError(`Processing failed: ${status.error}`);
-                this.resetForNewProcess();
-            }
+            this.handleStatus(status);
         } catch (error) {
             console.error('Error updating progress:', error);
             this.stopProgressPolling();
@@ -1,26 +1,97 @@
 """Web UI for Photo Normalizer."""
 
 import os
-import threading
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any
 from datetime import datetime
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 import uuid
 import platform
 import subprocess
 
-from .cli import iter_input_files, determine_capture_datetime, get_file_times
+from .cli import iter_input_files
 
+# Optional fast JSON serializer (SIMD-accelerated, native datetime support).
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None  # type: ignore
 
-app = Flask(__name__, 
+
+app = Flask(__name__,
             template_folder='templates',
             static_folder='static')
 
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            return orjson.dumps(obj).decode()
+
+        def loads(self, s, **kwargs: Any) -> Any:
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+
+def _dumps_compact(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    import json
+
+    return json.dumps(obj, default=str)
+
+
 # Store processing jobs
 processing_jobs: Dict[str, Dict[str, Any]] = {}
 
+# Per-job event queues feeding the SSE stream; updates are pushed once per
+# state change instead of being re-serialized on every poll.
+job_event_queues: Dict[str, "queue.Queue[Dict[str, Any]]"] = {}
+
+# Persistent, bounded pool running jobs; queued jobs wait their turn instead
+# of each request spawning an unbounded thread. The encode work inside each
+# job already fans out to a per-job process pool.
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
+job_executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS)
+job_futures: Dict[str, Future] = {}
+
+
+def _job_snapshot(job_id: str) -> Dict[str, Any]:
+    job = processing_jobs[job_id].copy()
+    start = job.get('start_time')
+    if isinstance(start, datetime):
+        job['elapsed_seconds'] = int((datetime.now() - start).total_seconds())
+        job['start_time'] = start.isoformat()
+    return job
+
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    """Update a job's state and publish a snapshot to its event queue."""
+    job = processing_jobs.get(job_id)
+    if job is None:
+        return
+    job.update(fields)
+    events = job_event_queues.get(job_id)
+    if events is not None:
+        snapshot = _job_snapshot(job_id)
+        try:
+            events.put_nowait(snapshot)
+        except queue.Full:
+            # Consumer is behind: drop the oldest update, keep the newest.
+            try:
+                events.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                events.put_nowait(snapshot)
+            except queue.Full:
+                pass
+
 # Default folders (override via env)
 DEFAULT_INPUT_DIR = Path(
     os.getenv("DEFAULT_INPUT_DIR", (Path.cwd() / "input").as_posix())
@@ -133,15 +204,13 @@ def process_photos():
         'completed_files': 0,
         'error': None
     }
-    
-    # Start processing in background thread
-    thread = threading.Thread(
-        target=process_photos_worker,
-        args=(job_id, input_dir, output_dir, options)
+    job_event_queues[job_id] = queue.Queue(maxsize=256)
+
+    # Submit to the persistent worker pool
+    job_futures[job_id] = job_executor.submit(
+        process_photos_worker, job_id, input_dir, output_dir, options
     )
-    thread.daemon = True
-    thread.start()
-    
+
     return jsonify({'job_id': job_id})
 
 
@@ -149,64 +218,39 @@ def process_photos_worker(job_id: str, input_dir: str, output_dir: str, options:
     """Background worker for photo processing."""
     try:
         # Update job status
-        processing_jobs[job_id]['status'] = 'scanning'
-        
+        _update_job(job_id, status='scanning')
+
         # Get input files
         input_path = Path(input_dir)
         recursive = options.get('recursive', True)
         input_files = list(iter_input_files(input_path, recursive))
-        
-        processing_jobs[job_id]['total'] = len(input_files)
-        
+
+        _update_job(job_id, total=len(input_files))
+
         if not input_files:
-            processing_jobs[job_id]['status'] = 'error'
-            processing_jobs[job_id]['error'] = 'No supported images found'
+            _update_job(job_id, status='error', error='No supported images found')
             return
-        
+
         # Update status to processing
-        processing_jobs[job_id]['status'] = 'processing'
-        
-        # Import and call the CLI main function with our parameters
-        import sys
-        from unittest.mock import patch
-        
-        # Prepare arguments for CLI
-        args = [
-            'photo-normalizer',
-            input_dir,
-            '-o', output_dir,
-            '--format', options.get('format', 'jpeg'),
-            '--quality', str(options.get('quality', 90)),
-            '--subfolders', options.get('subfolders', 'none')
-        ]
-        
-        if options.get('recursive', True):
-            args.append('-r')
-        
-        if not options.get('keep_metadata', True):
-            args.append('--strip-metadata')
-        
-        if options.get('copy_unchanged', True):
-            args.append('--copy-unchanged')
-        
-        # Mock sys.argv and call the CLI function
-        with patch.object(sys, 'argv', args):
-            # We'll implement a custom version that updates progress
-            process_with_progress(job_id, input_path, Path(output_dir), options)
-            
-        processing_jobs[job_id]['status'] = 'completed'
-        processing_jobs[job_id]['progress'] = 100
-        
+        _update_job(job_id, status='processing')
+
+        process_with_progress(job_id, input_path, Path(output_dir), options)
+
+        _update_job(job_id, status='completed', progress=100)
+
     except Exception as e:
-        processing_jobs[job_id]['status'] = 'error'
-        processing_jobs[job_id]['error'] = str(e)
+        _update_job(job_id, status='error', error=str(e))
 
 
 def process_with_progress(job_id: str, input_dir: Path, output_dir: Path, options: Dict[str, Any]):
     """Process photos with progress updates."""
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+    from functools import partial
+
     from .cli import (
-        PlanItem, OUTPUT_FORMAT_TO_EXT, build_target_path, 
-        ensure_unique, save_image
+        PlanItem, OUTPUT_FORMAT_TO_EXT, SourceCacheBudget, build_target_path,
+        ensure_unique, _plan_one, _save_one, _sort_plan, _sequence_numbers,
+        _make_target_dirs, _filter_exact_duplicates
     )
     
     # Get processing parameters
@@ -220,77 +264,87 @@ def process_with_progress(job_id: str, input_dir: Path, output_dir: Path, option
     target_ext = OUTPUT_FORMAT_TO_EXT[output_format]
     input_files = list(iter_input_files(input_dir, recursive))
     
-    # Build processing plan
+    # Build processing plan with a thread pool (EXIF reads are I/O-bound)
     plan = []
-    for i, path in enumerate(input_files):
-        processing_jobs[job_id]['current_file'] = path.name
-        processing_jobs[job_id]['progress'] = int((i / len(input_files)) * 20)  # 20% for planning
-        
-        try:
-            capture_dt = determine_capture_datetime(path)
-        except Exception:
-            capture_dt = get_file_times(path)
-
-        needs_reencode = True
-        if copy_unchanged and path.suffix.lower() == target_ext:
-            needs_reencode = False
-
-        plan.append(
-            PlanItem(
-                source=path,
-                capture_dt=capture_dt,
-                target=Path(),  # placeholder
-                needs_reencode=needs_reencode,
-            )
+    budget = SourceCacheBudget()
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        planned = executor.map(
+            partial(_plan_one, target_ext=target_ext, copy_unchanged=copy_unchanged, budget=budget),
+            input_files,
         )
+        for i, item in enumerate(planned):
+            _update_job(
+                job_id,
+                current_file=item.source.name,
+                progress=int((i / len(input_files)) * 20),  # 20% for planning
+            )
+            plan.append(item)
 
     # Sort by capture date
-    plan.sort(key=lambda p: (p.capture_dt, p.source.name))
+    plan = _sort_plan(plan)
+
+    # Drop byte-identical sources before the expensive encode pass
+    plan = _filter_exact_duplicates(plan, verbose=False)
 
     # Assign target paths
-    last_second = None
-    seq_in_second = 0
-    for item in plan:
-        current_second = item.capture_dt.replace(microsecond=0)
-        if last_second is None or current_second != last_second:
-            seq_in_second = 1
-            last_second = current_second
-        else:
-            seq_in_second += 1
+    assigned = set()
+    for item, seq_in_second in zip(plan, _sequence_numbers(plan)):
         target_path = build_target_path(output_dir, item.capture_dt, seq_in_second, subfolders, target_ext)
-        item.target = ensure_unique(target_path)
-
-    # Process files
-    processing_jobs[job_id]['status'] = 'processing'
-    for i, item in enumerate(plan):
-        processing_jobs[job_id]['current_file'] = item.source.name
-        processing_jobs[job_id]['progress'] = int(20 + (i / len(plan)) * 80)  # 20-100%
-        processing_jobs[job_id]['completed_files'] = i
-        
-        save_image(
-            src_path=item.source,
-            dest_path=item.target,
-            output_format=output_format,
-            quality=quality,
-            keep_metadata=keep_metadata,
-            reencode=item.needs_reencode,
-        )
+        item.target = ensure_unique(target_path, assigned)
+
+    _make_target_dirs(plan)
+
+    # Process files across all cores; update progress as futures complete
+    _update_job(job_id, status='processing')
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {
+            executor.submit(_save_one, (item, output_format, quality, keep_metadata)): item
+            for item in plan
+        }
+        completed = 0
+        for future in as_completed(futures):
+            future.result()
+            completed += 1
+            item = futures[future]
+            _update_job(
+                job_id,
+                current_file=item.source.name,
+                progress=int(20 + (completed / len(plan)) * 80),  # 20-100%
+                completed_files=completed,
+            )
 
 
 @app.route('/api/status/<job_id>')
 def get_job_status(job_id):
-    """Get processing job status."""
+    """Get processing job status (polling fallback; prefer /api/events)."""
     if job_id not in processing_jobs:
         return jsonify({'error': 'Job not found'}), 404
-    
-    job = processing_jobs[job_id].copy()
-    
-    # Add elapsed time
-    if 'start_time' in job:
-        elapsed = datetime.now() - job['start_time']
-        job['elapsed_seconds'] = int(elapsed.total_seconds())
-    
-    return jsonify(job)
+
+    return jsonify(_job_snapshot(job_id))
+
+
+@app.route('/api/events/<job_id>')
+def job_events(job_id):
+    """Stream job progress as Server-Sent Events."""
+    if job_id not in processing_jobs:
+        return jsonify({'error': 'Job not found'}), 404
+
+    events = job_event_queues.get(job_id)
+
+    def generate():
+        snapshot = _job_snapshot(job_id)
+        yield f"data: {_dumps_compact(snapshot)}\n\n"
+        while events is not None and snapshot.get('status') not in ('completed', 'error'):
+            try:
+                snapshot = events.get(timeout=15)
+            except queue.Empty:
+                if job_id not in processing_jobs:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield f"data: {_dumps_compact(snapshot)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream')
 
 
 @app.route('/static/<path:filename>')